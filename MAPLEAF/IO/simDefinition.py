@@ -5,10 +5,12 @@
 Contains a class to read, write and modify simulation definition (.mapleaf) files, the master dictionary of 
 default values for simulation definitions, and a few utility functions for working with string dictionary keys
 '''
+import functools
 import os
 import random
 import re
-import shlex
+import sys
+from bisect import bisect_left
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple, Union
@@ -17,6 +19,68 @@ from MAPLEAF.Motion import Vector
 
 __all__ = [ "defaultConfigValues", "SimDefinition", "getAbsoluteFilePath" ]
 
+# Regular expressions used during parsing/writing, precompiled once per runtime
+_COMMENT_RE = re.compile(r"(?<!\\)#.*")         # Comments: everything after an unescaped '#'
+_COMMENT_ESCAPE_RE = re.compile(r"\\(?=#)")     # Escape characters in front of '#' symbols
+_CMD_TOKEN_RE = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"|\'([^\'\\]*(?:\\.[^\'\\]*)*)\'|(\S+)') # Single-/double-quoted or bare tokens in a ! command line
+_LINE_RE = re.compile(r"^[ \t\r]*(\S.*?)[ \t\r]*$", re.MULTILINE) # Non-empty lines, with leading/trailing whitespace stripped
+_PATH_HINT_RE = re.compile(r"[/\\.]")           # Values without a slash, backslash or dot can't be file paths
+_SCALAR_RE = re.compile(r"[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$")    # Plain integer / floating point / exponential-notation numbers
+_VECTOR_RE = re.compile(r"\(.*\)$")             # Parenthesized values, assumed to be vectors
+
+def _splitCommand(line: str) -> List[str]:
+    ''' Tokenizes a ! command line (ex: !replace 'a b' with 'c'). Like shlex.split, quoted tokens may contain spaces, but much faster '''
+    return [ m.group(m.lastindex) for m in _CMD_TOKEN_RE.finditer(line) ]
+
+@functools.lru_cache(maxsize=None)
+def _containsAllPattern(needles: Tuple[str]):
+    ''' Compiled pattern matching strings that contain every one of `needles`, in any order. Used by `SimDefinition.findKeysContaining` '''
+    return re.compile("".join( "(?=.*" + re.escape(needle) + ")" for needle in needles ))
+
+def _stringsInteract(string1: str, string2: str) -> bool:
+    '''
+        True if occurrences of string1 and string2 can overlap in some text:
+        one contains the other, or a nonempty suffix of one equals a prefix of the other
+    '''
+    if string1 in string2 or string2 in string1:
+        return True
+
+    for k in range(1, min(len(string1), len(string2))):
+        if string1.endswith(string2[:k]) or string2.endswith(string1[:k]):
+            return True
+
+    return False
+
+def _replacementsAreIndependent(replacePairs: List[Tuple[str, str]]) -> bool:
+    '''
+        True if applying the given (toReplace, replaceWith) pairs in a single fused pass
+        gives the same result as applying them one after another.
+        Conservative: rejects any two search strings whose matches could overlap (sequential order
+        would decide the winner), and any replacement that could combine with surrounding text to
+        form another pair's search string (which only a later sequential pass would replace)
+    '''
+    for i, (search1, replace1) in enumerate(replacePairs):
+        for j, (search2, _) in enumerate(replacePairs):
+            if i == j:
+                continue
+            if _stringsInteract(search1, search2) or _stringsInteract(search2, replace1):
+                return False
+    return True
+
+def _applyReplaceCommands(derivedDict: Dict[str, str], replacePairs: List[Tuple[str, str]]) -> Dict[str, str]:
+    ''' Applies a batch of consecutive !replace commands to the keys and values of derivedDict '''
+    if len(replacePairs) > 1 and _replacementsAreIndependent(replacePairs):
+        # Apply all replacements in a single pass over each string
+        mapping = dict(replacePairs)
+        pattern = re.compile("|".join(map(re.escape, mapping)))
+        sub = lambda string: pattern.sub(lambda match: mapping[match.group(0)], string)
+        return { sub(key): sub(value) for key, value in derivedDict.items() }
+
+    # Replacements interact - apply them sequentially
+    for toReplace, replaceWith in replacePairs:
+        derivedDict = { key.replace(toReplace, replaceWith): value.replace(toReplace, replaceWith) for key, value in derivedDict.items() }
+    return derivedDict
+
 #################### Default value dictionary  #########################
 defaultConfigValues = {
     "Optimization.showConvergencePlot":                     "True",
@@ -128,6 +192,16 @@ defaultConfigValues = {
     "testDefaultValue2":                                "jkl;"
 }
 
+# The defaults are fixed at import time: intern the keys/values so lookups against them can
+# compare by identity. Left as a plain dict (rather than a MappingProxyType) because
+# SimDefinition objects holding a reference to this dict get deepcopied by the Monte Carlo
+# and Optimization runners, and mappingproxy objects can't be deepcopied
+defaultConfigValues = { sys.intern(key): sys.intern(value) for key, value in defaultConfigValues.items() }
+
+_MISSING = object() # Sentinel used to distinguish absent keys from stored values in dict.get calls
+
+_TABS = [ "\t" * depth for depth in range(8) ] # Precomputed indents for writeToFile, by nesting depth
+
 simDefinitionHelpMessage = \
 """
     All non-empty, non-comment lines are expected to end in either:
@@ -140,7 +214,7 @@ simDefinitionHelpMessage = \
 class SimDefinition():
 
     #### Parsing / Initialization ####
-    def __init__(self, fileName=None, dictionary=None, disableDistributionSampling=False, silent=False, defaultDict=None, simDefParseStack=None):
+    def __init__(self, fileName=None, dictionary=None, disableDistributionSampling=False, silent=False, defaultDict=None, simDefParseStack=None, subSimDefCache=None):
         '''
         Parse simulation definition files into a dictionary of string values accessible by string keys.
 
@@ -153,6 +227,7 @@ class SimDefinition():
             * defaultDict: (dict[str,str] provide a custom dictionary of default values. If none is provided, defaultConfigValues is used.)
             * simDefParseStack: set(str) list of sim definition files in the current parse stack. Will throw an error if any of these files need to be loaded to generate the current sim definition
                 # !include and !create [] from [] statements must form an acyclic graph of files to load (no circular loads)
+            * subSimDefCache: dict[str, SimDefinition] shared cache of already-parsed sub sim definition files, keyed by absolute path. Passed down through the parse so files referenced repeatedly are only parsed once
         
         Example:
             The file contents:  
@@ -183,10 +258,35 @@ class SimDefinition():
         self.simDefParseStack = { self.fileName } if (simDefParseStack == None) else simDefParseStack
         ''' Keeps track of which files have already been loaded in the current parse stack. If these are loaded again we're in a parsing loop '''
 
+        # Sorted-key cache used by _getSubKeysFast while parsing derived dictionaries
+        self._parseSortedKeys = None
+        self._parseSortedKeysLen = -1
+
+        self._subSimDefCache = {} if (subSimDefCache == None) else subSimDefCache
+        ''' Maps absolute file paths -> parsed SimDefinitions, shared across the current parse tree. Files referenced by multiple !include / !create commands are only read and parsed once '''
+
+        # Sorted snapshot of self.dict's keys used by getSubKeys/getImmediateSubKeys/getImmediateSubDicts,
+        # built on first use
+        self._sortedKeys = None
+        self._sortedKeysLen = -1
+
+        # Caches _getClassBasedDefaultValue results - cleared whenever a '.class' key changes
+        self._classDefaultCache = {}
+
+        # Relative file paths in values are resolved lazily, on first access - track which keys have been checked
+        self._pathResolvedKeys = set()
+        self._fileDirectory = None # Directory containing this sim definition file, computed on first use
+        self._fileParentDir = None # str(Path(fileName).parent), computed on first use by _loadSubSimDefinition
+
         # Parse/Assign main values dictionary
         if dictionary != None:
             self.dict = dictionary
         elif fileName != None:
+            if simDefParseStack == None:
+                # Root of a new parse tree (sub sim definitions are passed the parse stack) -
+                # drop file-path resolutions memoized by previous parses, in case files have
+                # been created or removed since (ex: continuation files written by Optimization)
+                _findAbsoluteFilePath.cache_clear()
             self.dict = self._parseSimDefinitionFile(fileName)
         else:
             raise ValueError("No fileName or dictionary provided to initialize the SimDefinition")
@@ -194,11 +294,9 @@ class SimDefinition():
         # Initialize tracking of default values used and unaccessed keys
         self._resetUsageTrackers()
 
-        # Check if any probabilistic keys exist
-        containsProbabilisticValues = False
-        for key in self.dict:
-            if "_stdDev" == key[-7:]:
-                containsProbabilisticValues = True
+        # Check if any probabilistic keys exist (early-exits on the first one found)
+        self._containsProbabilisticValues = any(key.endswith("_stdDev") for key in self.dict)
+        ''' True if any '_stdDev'-suffixed keys are present. Lets resampleProbabilisticValues skip the dictionary scan entirely for the common non-Monte-Carlo case. Kept up to date by setValue/removeKey '''
 
         # Initialize instance of random.Random for Monte Carlo sampling
         if not disableDistributionSampling:
@@ -207,7 +305,7 @@ class SimDefinition():
             except KeyError:
                 randomSeed = random.randrange(1000000)
             
-            if not silent and containsProbabilisticValues:
+            if not silent and self._containsProbabilisticValues:
                 print("Monte Carlo random seed: {}".format(randomSeed))
                 
             self.rng = random.Random(randomSeed)
@@ -223,14 +321,29 @@ class SimDefinition():
             Throws ValueError if circular parsing detected.
             Returns a new SimDefinition object
         '''
-        filePath = getAbsoluteFilePath(path, str( Path(self.fileName).parent ))
+        if self._fileParentDir is None:
+            self._fileParentDir = str( Path(self.fileName).parent )
+
+        filePath = getAbsoluteFilePath(path, self._fileParentDir)
+
+        try:
+            # Already parsed this file earlier in the current parse - reuse the result
+            return self._subSimDefCache[filePath]
+        except KeyError:
+            pass
 
         if filePath not in self.simDefParseStack:
             self.simDefParseStack.add(filePath)
-            subSimDef = SimDefinition(filePath, simDefParseStack=self.simDefParseStack)
+            subSimDef = SimDefinition(filePath, simDefParseStack=self.simDefParseStack, subSimDefCache=self._subSimDefCache)
             self.simDefParseStack.remove(filePath)
+
+            # Resolve the sub-file's relative paths eagerly, while we still know which file its values came from
+                # (the keys are about to be copied into this SimDefinition, which may live in a different directory)
+            subSimDef._replaceRelativeFilePathsWithAbsolutePaths(subSimDef.dict)
+
+            self._subSimDefCache[filePath] = subSimDef
             return subSimDef
-        
+
         else:
             raise ValueError("Encountered circular reference while trying to parse SimDefinition file: {}, which references: {}, which is already in the current parse stack: {}".format(self.fileName, filePath, self.simDefParseStack))
 
@@ -246,60 +359,59 @@ class SimDefinition():
         '''
         i = startLine
 
+        # Precompute the key prefix once per recursion level instead of re-concatenating it per line
+        prefix = currDictName + "." if currDictName != "" else ""
+
         while i < len(workingText):
-            line = workingText[i].strip()
-            splitLine = line.split()
-            
-            if splitLine[0] == "!create":
+            line = workingText[i] # Lines are already stripped by _parseSimDefinitionFile
+
+            # Dispatch on the first/last character where possible, to avoid tokenizing every line
+            if line[0] == "!" and line.startswith("!create"):
                 # Parse derived subdictionary
                 i = self._parseDerivedDictionary(Dict, workingText, i, currDictName)
 
-            elif splitLine[0] == "!include":
+            elif line[0] == "!" and line.startswith("!include"):
                 # Include contents of another sim definition file
                 filePath = line[line.index(" "):].strip() # Handle file names with spaces
                 subDef = self._loadSubSimDefinition(filePath)
 
                 # Add keys to current sim definition, inside current dictionary
+                    # Interned like every other key insertion - included keys are exactly the ones repeated across files
                 for subDefkey in subDef.dict:
-                    if currDictName == "":
-                        key = subDefkey
-                    else:
-                        key = currDictName + "." + subDefkey
-
-                    Dict[key] = subDef.dict[subDefkey]
+                    Dict[sys.intern(prefix + subDefkey)] = subDef.dict[subDefkey]
 
             elif line[-1] == '{':
                 # Parse regular Subdictionary
                 subDictName = line[:-1] # Remove whitespace and dict start bracket
-                
+
                 # Recursive call to parse subdictionary
-                if currDictName == "":
-                    i = self._parseDictionaryContents(Dict, workingText, i+1, subDictName, allowKeyOverwriting)
-                else:
-                    i = self._parseDictionaryContents(Dict, workingText, i+1, currDictName + "." + subDictName, allowKeyOverwriting)
+                i = self._parseDictionaryContents(Dict, workingText, i+1, prefix + subDictName, allowKeyOverwriting)
 
             elif line == '}':
                 #End current dictionary - continue parsing at next line
                 return i
-                        
-            elif len(splitLine) > 1:
-                # Save a space-separated key-value pair
-                key = splitLine[0]
-                value = " ".join(splitLine[1:])
-                if currDictName == "":
-                    keyString = key
-                else:
-                    keyString = currDictName + "." + key
 
-                if not keyString in Dict or allowKeyOverwriting:
-                    Dict[keyString] = value
-                else:
-                    raise ValueError("Duplicate Key: " + keyString + " in File: " + self.fileName)
-            
             else:
-                # Error: Line not recognized as a dict start/end or a key/value pair
-                print(simDefinitionHelpMessage)
-                raise ValueError("Problem parsing line {}: {}".format(i, line))
+                # Only tokenize lines that can actually be key-value pairs
+                    # Single maxsplit=1 scan stops at the first whitespace run - no list of word tokens + join required
+                splitLine = line.split(None, 1)
+
+                if len(splitLine) > 1:
+                    # Save a whitespace-separated key-value pair
+                    # Keys are interned: they're compared constantly (dict probes, prefix checks) and
+                    # repeat across sim definitions, so pointer-identity comparisons and sharing pay off
+                    keyString = sys.intern(prefix + splitLine[0])
+                    value = splitLine[1]
+
+                    if not keyString in Dict or allowKeyOverwriting:
+                        Dict[keyString] = value
+                    else:
+                        raise ValueError("Duplicate Key: " + keyString + " in File: " + self.fileName)
+
+                else:
+                    # Error: Line not recognized as a dict start/end or a key/value pair
+                    print(simDefinitionHelpMessage)
+                    raise ValueError("Problem parsing line {}: {}".format(i, line))
 
             # Next line
             i += 1
@@ -318,7 +430,7 @@ class SimDefinition():
         '''
         # workingText[initializationLine] should be something like:
             # '    !create SubDictionary2 from Dictionary1.SubDictionary1{'
-        definitionLine = shlex.split(workingText[initializationLine])
+        definitionLine = _splitCommand(workingText[initializationLine])
 
         # Figure out complete name of new dictionary
         if currDictName == '':
@@ -337,12 +449,12 @@ class SimDefinition():
             sourceDict = subSimDef.dict
             
             dictPath = dictPath.split(":")[1]
-            keysInParentDict = subSimDef.getSubKeys(dictPath)                
-        
+            keysInParentDict = subSimDef._getSubKeysFast(dictPath, subSimDef.dict)
+
         else:
             # Deriving from dictionary in current file
             # Get keys from parent dict
-            keysInParentDict = self.getSubKeys(dictPath, Dict)
+            keysInParentDict = self._getSubKeysFast(dictPath, Dict)
             sourceDict = Dict
         
         if len(keysInParentDict) == 0:
@@ -359,39 +471,26 @@ class SimDefinition():
 
         #### Apply additional commands ####
         i = initializationLine + 1
+        replacePairs = [] # Consecutive !replace commands are batched and applied together where possible
         while i < len(workingText):
             line = workingText[i]
-            command = shlex.split(line)
-
-            def removeQuotes(string):
-                string = string.replace("'", "")
-                return string.replace('"', "")
+            command = _splitCommand(line)
 
             if command[0] == "!replace":
-                # Get string to replace and its replacement
-                toReplace = removeQuotes(command[1])
-                replaceWith = removeQuotes(command[-1])
-
-                derivedDictAfterReplace = {}
-                for key in derivedDict:
-                    newKey = key.replace(toReplace, replaceWith)
-                    # .pop() gets the old value and also deletes it from the dictionary
-                    newValue = derivedDict[key].replace(toReplace, replaceWith)
-                    derivedDictAfterReplace[newKey] = newValue
-
-                derivedDict = derivedDictAfterReplace
+                # Queue string to replace and its replacement (_splitCommand already strips any quotes)
+                replacePairs.append((command[1], command[-1]))
 
             elif command[0] == "!removeKeysContaining":
-                stringToDelete = command[1]
+                if replacePairs:
+                    derivedDict = _applyReplaceCommands(derivedDict, replacePairs)
+                    replacePairs = []
 
-                # Search for and remove any keys that contain stringToDelete
-                keysToDelete = []
-                for key in derivedDict:
-                    if stringToDelete in key:
-                        keysToDelete.append(key)
+                stringToDelete = command[1]
 
-                for key in keysToDelete:
-                    del derivedDict[key]                
+                # Search for and remove any keys that contain stringToDelete.
+                # Delete in place - no point rebuilding the whole dict when few (or no) keys match
+                for key in [ key for key in derivedDict if stringToDelete in key ]:
+                    del derivedDict[key]
 
             elif line[0] != "!":
                 break # Done special commands - let the regular parser handle the rest
@@ -401,69 +500,106 @@ class SimDefinition():
 
             i += 1
 
+        if replacePairs:
+            derivedDict = _applyReplaceCommands(derivedDict, replacePairs)
+
         #### Add derivedDict values to Dict ####
         for key in derivedDict:
             # Make sure we don't clobber existing values with poorly thought-out replace commands
             if key not in Dict:
-                Dict[key] = derivedDict[key]
+                Dict[sys.intern(key)] = derivedDict[key]
             else:
                 raise ValueError("Derived dict key {} already exists".format(key, self.fileName))
 
         #### Parse any regular values in derived dict ####
         return self._parseDictionaryContents(Dict, workingText, i, derivedDictName, allowKeyOverwriting=True)
 
+    def _getSubKeysFast(self, dictPath: str, Dict) -> List[str]:
+        '''
+            Prefix-indexed version of getSubKeys used while parsing derived (!create) dictionaries.
+            Keeps a sorted snapshot of Dict's keys and binary-searches the prefix range, so repeated
+            !create commands referencing the same dict don't re-scan every key.
+            Since parsing only ever adds keys, the cache is stale exactly when Dict has grown.
+        '''
+        if self._parseSortedKeys is None or self._parseSortedKeysLen != len(Dict):
+            self._parseSortedKeys = sorted(Dict)
+            self._parseSortedKeysLen = len(Dict)
+
+        # All subkeys of dictPath sort between 'dictPath.' and 'dictPath/' ('/' is the character after '.')
+        lo = bisect_left(self._parseSortedKeys, dictPath + ".")
+        hi = bisect_left(self._parseSortedKeys, dictPath + "/")
+        return self._parseSortedKeys[lo:hi]
+
+    def _resolveFilePathValue(self, value: str) -> str:
+        '''
+            Tries to detect a path relative to the MAPLEAF installation directory, or to the location of
+            this sim definition file, in a single value and returns its absolute equivalent.
+            Returns the value unchanged if it isn't a resolvable path.
+        '''
+        # Remove leading dot/slash
+        val = value[2:] if value.startswith("./") else value
+
+        resolved = None
+
+        if pathIsRelativeToRepository(val):
+            # Replace the relative path with an absolute one
+            resolved = getAbsoluteFilePath(val)
+
+        if isFileName(val) and self.fileName != None:
+            # Check if the file path is relative to the location of the simulation definition file
+            if self._fileDirectory is None:
+                self._fileDirectory = os.path.dirname(os.path.realpath(self.fileName))
+
+            possibleLocation = os.path.join(self._fileDirectory, val)
+            if os.path.exists(possibleLocation):
+                resolved = possibleLocation
+
+        return value if resolved is None else resolved
+
     def _replaceRelativeFilePathsWithAbsolutePaths(self, Dict):
-        ''' 
+        '''
             Tries to detect paths relative to the MAPLEAF installation directory and replaces them with absolute paths.
             This allows MAPLEAF to work when installed from pip and being run outside its installation directory.
         '''
-        if self.fileName != None:
-            fileDirectory = os.path.dirname(os.path.realpath(self.fileName))
-        else:
-            fileDirectory = None
-
         for key in Dict:
             # Iterate over all keys, looking for file path relative to the MAPLEAF repo
             val = Dict[key]
-            
-            # Remove leading dot/slash
-            if val[:2] == "./":
-                val = val[2:]
 
-            if pathIsRelativeToRepository(val):
-                # Replace the relative path with an absolute one
-                Dict[key] = getAbsoluteFilePath(val)
-            
-            if isFileName(val):
-                # Check if the file path is relative to the location of the simulation definition file
-                if fileDirectory != None:
-                    possibleLocation = os.path.join(fileDirectory, val)
-                    if os.path.exists(possibleLocation):
-                        Dict[key] = possibleLocation
+            # Skip values that obviously can't be file paths (ex: '(0 0 0)', 'true')
+            if not _PATH_HINT_RE.search(val):
+                continue
+
+            resolved = self._resolveFilePathValue(val)
+            if resolved is not val:
+                Dict[key] = resolved
 
     def _parseSimDefinitionFile(self, fileName):
         Dict = {}
         
         # Read all of the file's contents
-        file = open(fileName, "r+")
-        workingText = file.read()
-        file.close()
+        workingText = Path(fileName).read_text(encoding="utf-8")
         
         # Remove comments
-        comment = re.compile("(?<!\\\)#.*") 
-        workingText = re.sub(comment, "", workingText) 
-        
+        workingText = _COMMENT_RE.sub("", workingText)
+
         # Remove comment escape characters
-        workingText = re.sub(r"\\(?=#)", "", workingText) 
+        workingText = _COMMENT_ESCAPE_RE.sub("", workingText)
         
-        # Remove blank lines
-        workingText = [line for line in workingText.split('\n') if line.strip() != '']
+        # Extract stripped, non-empty lines in a single pass over the text
+        workingText = _LINE_RE.findall(workingText)
         
         # Start recursive parse by asking to parse the root-level dictionary
         self._parseDictionaryContents(Dict, workingText, 0, "")
 
-        # Look for file paths relative to the MAPLEAF install location, replace them with absolute paths
-        self._replaceRelativeFilePathsWithAbsolutePaths(Dict)
+        # File paths relative to the MAPLEAF install location are resolved lazily by getValue, on first access
+
+        # Release the parse-time sorted-key cache
+        self._parseSortedKeys = None
+        self._parseSortedKeysLen = -1
+
+        # Release the sub sim definition cache - it's only consulted while parsing, and keeping the
+        # parsed sub-files alive would make every deepcopy of this object (ex: per Monte Carlo run) clone them too
+        self._subSimDefCache = {}
 
         return Dict
 
@@ -479,57 +615,71 @@ class SimDefinition():
         if Dict is None:
             Dict = self.dict
 
+        if Dict is self.dict and not self._containsProbabilisticValues:
+            # No '_stdDev' keys present - nothing to sample
+            return
+
         if not self.disableDistributionSampling:
-            keys = list(Dict.keys()) # Get a list of keys at the beginning to avoid issues from the number of keys changing during iterations
-            
-            for key in keys:
+            # Collect the (usually few) probabilistic keys up front, so the main dictionary is only traversed once
+                # Also avoids issues from the number of keys changing while sampling adds '_mean' keys
+            probabilisticKeys = [ key[:-7] for key in Dict if key.endswith("_stdDev") and key[:-7] in Dict ]
+
+            for key in probabilisticKeys:
                 ### Sample any probabilistic values from normal distribution ###
                 stdDevKey = key + "_stdDev"
-                
-                if stdDevKey in Dict:
-                    logLine = None
-                    meanKey = key + "_mean"
+                logLine = None
+                meanKey = key + "_mean"
 
-                    try:
-                        meanString = Dict[meanKey]
-                    except KeyError:
-                        # Take the value of the variable as the mean if a _mean value is not provided
-                        meanString = Dict[key]
-                        Dict[meanKey] =  meanString
-
-                    # Try parsing scalar values
-                    try:
-                        mu = float(meanString)
-                        sigma = float(Dict[stdDevKey])
+                try:
+                    meanString = Dict[meanKey]
+                except KeyError:
+                    # Take the value of the variable as the mean if a _mean value is not provided
+                    meanString = Dict[key]
+                    Dict[meanKey] =  meanString
 
-                        sampledValue = self.rng.gauss(mu, sigma)
-                        Dict[key] = str(sampledValue)
+                stdDevString = Dict[stdDevKey]
 
-                        logLine = "Sampling scalar parameter: {}, value: {:1.3f}".format(key, sampledValue)
+                # Classify values with cheap regexes where possible - avoids two exception raise/catch cycles per vector-valued parameter
+                if _SCALAR_RE.match(meanString) and _SCALAR_RE.match(stdDevString):
+                    logLine = self._sampleScalar(key, Dict, meanString, stdDevString)
+                else:
+                    try:
+                        if _VECTOR_RE.match(meanString) and _VECTOR_RE.match(stdDevString):
+                            logLine = self._sampleVector(key, Dict, meanString, stdDevString)
+                        else:
+                            # Ambiguous value - try parsing a scalar, then a vector
+                            try:
+                                logLine = self._sampleScalar(key, Dict, meanString, stdDevString)
+                            except ValueError:
+                                logLine = self._sampleVector(key, Dict, meanString, stdDevString)
 
                     except ValueError:
-                        # Try parsing vector value
-                        try:
-                            muVec = Vector(meanString)
-                            sigmaVec = Vector(Dict[stdDevKey])
-
-                            sampledVec = Vector(*[ self.rng.gauss(mu, sigma) for mu, sigma in zip(muVec, sigmaVec)])
-                            Dict[key] =  str(sampledVec)
-
-                            logLine = "Sampling vector parameter: {}, value: ({:1.3f})".format(key, sampledVec)
-                            
-                        except ValueError:
-                            # ValueError throws if either conversion to Vector fails
-                            # Note that monte carlo / probabilistic variables can only be scalars or vectors
-                            print("ERROR: Unable to parse probabilistic value: {} for key {} (or {} for key {}). Note that probabilistic values must be either scalars or vectors of length 3.".format(meanString, meanKey, self.getValue(stdDevKey), stdDevKey))
-                            raise
-                    
-                    ### Logging ###
-                    if logLine != None:
-                        if self.monteCarloLogger != None:
-                            self.monteCarloLogger.log(logLine)
-                        elif not self.silent:
-                            print(logLine)
+                        # ValueError throws if either conversion to Vector fails
+                        # Note that monte carlo / probabilistic variables can only be scalars or vectors
+                        print("ERROR: Unable to parse probabilistic value: {} for key {} (or {} for key {}). Note that probabilistic values must be either scalars or vectors of length 3.".format(meanString, meanKey, stdDevString, stdDevKey))
+                        raise
+
+                ### Logging ###
+                if logLine != None:
+                    if self.monteCarloLogger != None:
+                        self.monteCarloLogger.log(logLine)
+                    elif not self.silent:
+                        print(logLine)
+
+    def _sampleScalar(self, key: str, Dict, meanString: str, stdDevString: str) -> str:
+        ''' Samples a scalar value from a normal distribution, stores it in Dict[key], returns a log line '''
+        sampledValue = self.rng.gauss(float(meanString), float(stdDevString))
+        Dict[key] = str(sampledValue)
+        return "Sampling scalar parameter: {}, value: {:1.3f}".format(key, sampledValue)
+
+    def _sampleVector(self, key: str, Dict, meanString: str, stdDevString: str) -> str:
+        ''' Samples a vector value component-wise from normal distributions, stores it in Dict[key], returns a log line '''
+        muVec = Vector(meanString)
+        sigmaVec = Vector(stdDevString)
+
+        sampledVec = Vector(*[ self.rng.gauss(mu, sigma) for mu, sigma in zip(muVec, sigmaVec)])
+        Dict[key] = str(sampledVec)
+        return "Sampling vector parameter: {}, value: ({:1.3f})".format(key, sampledVec)
 
     def getValue(self, key: str) -> str:
         """
@@ -543,33 +693,63 @@ class SimDefinition():
         key = key.strip()
 
         ### Find string/mean value ###
-        if self.dict.__contains__(key):
-            if key in self.unaccessedFields: # Track which keys are accessed
-                self.unaccessedFields.remove(key)
-            return self.dict[key]
-        
-        elif key in self.defaultDict:
+        value = self.dict.get(key, _MISSING)
+        if value is not _MISSING:
+            self.unaccessedFields.discard(key) # Track which keys are accessed
+
+            # Resolve relative file paths on first access (cheaper than eagerly checking every key at parse time)
+            if key not in self._pathResolvedKeys:
+                self._pathResolvedKeys.add(key)
+                if _PATH_HINT_RE.search(value):
+                    resolved = self._resolveFilePathValue(value)
+                    if resolved is not value:
+                        self.dict[key] = resolved
+                        value = resolved
+
+            return value
+
+        value = self.defaultDict.get(key, _MISSING)
+        if value is not _MISSING:
             self.defaultValuesUsed.add(key)
-            return self.defaultDict[key]
+            return value
+
+        # Check if there's a class-based default value to return
+        classBasedDefaultValue = self._getClassBasedDefaultValue(key)
+
+        if classBasedDefaultValue != None:
+            return classBasedDefaultValue
         else:
-            # Check if there's a class-based default value to return
-            classBasedDefaultValue = self._getClassBasedDefaultValue(key)
-            
-            if classBasedDefaultValue != None:
-                return classBasedDefaultValue
-            else:
-                raise KeyError("Key: " + key + " not found in {} or default config values".format(self.fileName))
+            raise KeyError("Key: " + key + " not found in {} or default config values".format(self.fileName))
 
     def setValue(self, key: str, value) -> None:
         '''
             Will add the entry if it's not present
         '''
         # The .strip() removes whitespace
-        self.dict[key.strip()] = value
+        key = sys.intern(key.strip())
+        self.dict[key] = value
+        self._pathResolvedKeys.discard(key) # New value may contain an unresolved relative path
+
+        if key.endswith("_stdDev"):
+            self._containsProbabilisticValues = True
+
+        if key.endswith(".class"):
+            # A new/changed class can change which class-based defaults apply
+            self._classDefaultCache.clear()
 
     def removeKey(self, key: str):
         if key in self.dict:
-            return self.dict.pop(key)
+            value = self.dict.pop(key)
+            self._sortedKeys = None # A removal balanced by an insertion wouldn't change len(self.dict) - invalidate explicitly
+
+            if key.endswith("_stdDev"):
+                # May have removed the last probabilistic key - rescan
+                self._containsProbabilisticValues = any(k.endswith("_stdDev") for k in self.dict)
+
+            if key.endswith(".class"):
+                self._classDefaultCache.clear()
+
+            return value
         else:
             print("Warning: " + key + " not found, can't delete")
             return None
@@ -586,132 +766,144 @@ class SimDefinition():
         '''
         self.fileName = fileName
 
+        # Build a tree of nested dictionaries from the flat dotted keys, in a single pass
+            # Leaf values are stored as strings, subdictionaries as dicts
+            # If a key is both a value and a subdictionary (rare), the value is stored inside the subdictionary under the sentinel key ""
+        root = {}
+        for key, value in self.dict.items():
+            node = root
+            segments = key.split('.')
+            for segment in segments[:-1]:
+                child = node.get(segment)
+                if not isinstance(child, dict):
+                    # Create the subdictionary, moving any same-named leaf value under the sentinel key
+                    child = {} if child is None else { "": child }
+                    node[segment] = child
+                node = child
+
+            lastSegment = segments[-1]
+            existingChild = node.get(lastSegment)
+            if isinstance(existingChild, dict):
+                existingChild[""] = value
+            else:
+                node[lastSegment] = value
+
+        # Accumulate output in memory, then write the file in a single call
+        parts = []
+
+        # Write Header
+        if writeHeader:
+            parts.append("# MAPLEAF\n")
+            parts.append("# File: {}\n".format(fileName))
+            parts.append("# Autowritten on: " + str(datetime.now()) + "\n")
+
+        self._writeDictTree(parts, root, 0)
+
         with open(fileName, 'w') as file:
-            # Extract the fileName from the fileName variable, which may contain other folder names
-            dictName = re.sub("^.*/", "", fileName)
-
-            # Write Header
-            if writeHeader:
-                file.write("# MAPLEAF\n")
-                file.write("# File: {}\n".format(fileName))
-                file.write("# Autowritten on: " + str(datetime.now()) + "\n")
-
-            # Sorting the keys before iterating through them ensures that dictionaries will be stored together
-            sortedDict = sorted(self.dict.items())
-            currDicts = []
-            for key in sortedDict:
-                key = key[0]
-                dicts = key.split('.')[:-1]
-
-                # Need to get be in the appropriate dictionary before writing the key, value pair
-                if dicts != currDicts:
-                    
-                    #Close any uneeded dictionaries
-                    dictDepth = currDicts.__len__()
-                    while dictDepth > 0:
-                        if dictDepth > dicts.__len__():
-                            file.write("\t"*(dictDepth-1) + "}\n")
-                        elif currDicts[dictDepth-1] != dicts[dictDepth-1]:
-                            file.write("\t"*(dictDepth-1) + "}\n")
-                        else:
-                            break
-                        
-                        dictDepth = dictDepth - 1
-
-                    openedNewDict = False
-
-                    #Open any new dictionaries
-                    while dictDepth < dicts.__len__():
-                        newDict = dicts[dictDepth]
-                        file.write("\n" + "\t" * dictDepth + newDict + "{\n")
-                        dictDepth = dictDepth + 1
-                        openedNewDict = True
-                    
-                    if not openedNewDict:
-                        # If no new dictionary was openend after closing unneeded ones, add a spacing line before writing keys/values
-                        file.write("\n")
-
-                    currDicts = dicts
-
-                #Add the key, value
-                dictDepth = currDicts.__len__()
-                realKey = re.sub("^([^\.]*\.)+", "", key)
-                file.write( "\t"*dictDepth + realKey + "\t" + self.dict[key] + "\n")
-
-            #Close any open dictionaries
-            dictDepth = currDicts.__len__()
-            while dictDepth > 0:
-                dictDepth = dictDepth - 1
-                file.write("\t"*dictDepth + "}\n")
+            file.write("".join(parts))
+
+    @classmethod
+    def _writeDictTree(cls, parts: List[str], node, depth: int) -> None:
+        ''' Recursively renders one level of the nested-dict tree assembled by writeToFile, appending output chunks to parts '''
+        # Sort subdictionaries as 'name.' so sibling ordering matches a lexicographic sort of the original dotted keys
+        entries = sorted(node.items(), key=lambda item: item[0] + "." if isinstance(item[1], dict) else item[0])
+
+        indent = _TABS[depth] if depth < len(_TABS) else "\t" * depth
+        prevChildWasDict = False
+        for name, child in entries:
+            if isinstance(child, dict):
+                # If this name holds both a value and a subdictionary, write the value first
+                leafValue = child.pop("", None)
+                if leafValue is not None:
+                    if prevChildWasDict:
+                        parts.append("\n") # Spacing line between the end of a subdictionary and subsequent keys/values
+                    parts.append(indent + name + "\t" + leafValue + "\n")
+
+                parts.append("\n" + indent + name + "{\n")
+                cls._writeDictTree(parts, child, depth+1)
+                parts.append(indent + "}\n")
+                prevChildWasDict = True
+
+            else:
+                if prevChildWasDict:
+                    parts.append("\n") # Spacing line between the end of a subdictionary and subsequent keys/values
+                parts.append(indent + name + "\t" + child + "\n")
+                prevChildWasDict = False
 
     #### Introspection / Key Gymnastics ####
     def findKeysContaining(self, keyContains: List[str]) -> List[str]:
         '''
-            Returns a list of all keys that contain any of the strings in keyContains
-            
-            ## Example  
+            Returns a list of all keys that contain any of the strings in keyContains.
+            Returns an empty list if nothing matches.
+
+            ## Example
                 findKeysContaining(["class"]) ->  
                 [ "Rocket.class", "Rocket.Sustainer.class", "Rocket.Sustainer.Nosecone.class", etc... ]
         '''
         if not isinstance(keyContains, list):
             keyContains = [ keyContains ]
-        
-        matchingKeys = []
-        for key in self.dict.keys():
-            match = True
-            for str in keyContains:
-                if str not in key:
-                    match = False
-                    break
-            
-            if match:
-                matchingKeys.append(key)
-        
-        if len(matchingKeys) > 0:
-            return matchingKeys
+
+        if len(keyContains) == 1:
+            # Common case - a single substring check stays entirely on str.__contains__'s C fast path
+            needle = keyContains[0]
+            matchingKeys = [ key for key in self.dict if needle in key ]
         else:
-            return None
+            # Test all the substrings in one C-level pass per key with a cached compiled pattern
+            pattern = _containsAllPattern(tuple(sorted(keyContains, key=len, reverse=True)))
+            matchingKeys = [ key for key in self.dict if pattern.match(key) ]
+
+        return matchingKeys
+
+    def _getSortedKeys(self) -> List[str]:
+        '''
+            Returns a lexicographically-sorted snapshot of self.dict's keys, within which any
+            dictionary's subkeys form a contiguous, binary-searchable range.
+            Rebuilt lazily whenever self.dict has changed size; `removeKey` invalidates it directly
+            to cover removals balanced by insertions.
+        '''
+        if self._sortedKeys is None or self._sortedKeysLen != len(self.dict):
+            self._sortedKeys = sorted(self.dict)
+            self._sortedKeysLen = len(self.dict)
+
+        return self._sortedKeys
 
     def getSubKeys(self, key: str, Dict=None) -> List[str]:
         '''
             Returns a list of all keys that are children of key
 
-            ## Example  
-                getSubKeys("Rocket") ->  
+            ## Example
+                getSubKeys("Rocket") ->
                 [ "Rocket.position", "Rocket.Sustainer.NoseCone.mass", "Rocket.Sustainer.RecoverySystem.position", etc... ]
         '''
-        #TODO: Improve speed by keeping dict sorted, then use binary search to locate first/last subkeys
-        Dict = self.dict if (Dict == None) else Dict
+        if Dict is not None and Dict is not self.dict:
+            # The sorted-key cache only indexes self.dict - fall back to a linear scan for other dictionaries
+            return [ currentKey for currentKey in Dict.keys() if isSubKey(key, currentKey) ]
 
-        subKeys = []
-        for currentKey in Dict.keys():
-            if isSubKey(key, currentKey):
-                subKeys.append(currentKey)
-        
-        return subKeys
+        sortedKeys = self._getSortedKeys()
+
+        if key == "":
+            # All keys are children of an empty key
+            return sortedKeys[:]
+
+        # All subkeys of key sort between 'key.' and 'key/' ('/' is the character after '.')
+        lo = bisect_left(sortedKeys, key + ".")
+        hi = bisect_left(sortedKeys, key + "/")
+        return sortedKeys[lo:hi]
 
     def getImmediateSubKeys(self, key: str) -> List[str]:
-        """ 
+        """
             Returns all keys that are immediate children of the parentKey (one 'level' lower)
-            
+
             .. note:: Will not return subdictionaries, only keys that have a value associated with them. Use self.getImmediateSubDicts() to discover sub-dictionaries
 
             ## Example:
-                getImmediateSubKeys("Rocket") ->  
+                getImmediateSubKeys("Rocket") ->
                 [ "Rocket.name", "Rocket.position", "Rocket.velocity", etc...]
         """
-        results = set()
-        for potentialChildKey in self.dict.keys():
-            # Iterate through all keys - check if they are children of currentPath
-            if isSubKey(key, potentialChildKey):
-                # If so, get the part of the key that is the immediate child of currentPath
-                immediateSubkey = getImmediateSubKey(key, potentialChildKey)
-                
-                if immediateSubkey in self.dict:
-                    # If we haven't got it already, save it
-                    results.add(immediateSubkey)
+        childLevel = getKeyLevel(key) + 1
 
-        return list(results)
+        # Deeper subkeys belong to subdictionaries, not to `key` itself
+        return [ subKey for subKey in self.getSubKeys(key) if getKeyLevel(subKey) == childLevel ]
 
     def getImmediateSubDicts(self, key: str) -> List[str]:
         '''
@@ -723,19 +915,25 @@ class SimDefinition():
 
             .. note:: This example would not return a dictionry like: "Rocket.StageOne.FinSet" because it's not an immediate subdictionary of "Rocket"
         '''
-        keyLevel = getKeyLevel(key)
-        subKeys = self.getSubKeys(key)
-
-        subDictionaries = set()
-        for subKey in subKeys:
-            subKeyLevel = getKeyLevel(subKey)
-            if subKeyLevel - keyLevel > 1:
-                # A subkey would have 1 level higher
-                # A subkey of a subdictionary would have 2 levels higher - this is what we're looking for
-                subDictKey = getParentKeyAtLevel(subKey, keyLevel+1)
-                subDictionaries.add(subDictKey)
-        
-        return list(subDictionaries)
+        childLevel = getKeyLevel(key) + 1
+
+        subDictionaries = []
+        previousSubDict = None
+        for subKey in self.getSubKeys(key):
+            # Split each subkey once (cached) instead of separate getKeyLevel/getParentKeyAtLevel calls
+            components = _splitKey(subKey)
+
+            if len(components) - 1 > childLevel:
+                # A subkey would be exactly 1 level deeper
+                # A subkey of a subdictionary would be 2+ levels deeper - this is what we're looking for
+                subDictKey = ".".join(components[:childLevel+1])
+
+                # getSubKeys returns sorted keys, so duplicates are adjacent
+                if subDictKey != previousSubDict:
+                    subDictionaries.append(subDictKey)
+                    previousSubDict = subDictKey
+
+        return subDictionaries
 
     def _getClassBasedDefaultValue(self, key: str) -> Union[str, None]:
         ''' 
@@ -746,37 +944,51 @@ class SimDefinition():
                 Attempt1 = "Rocket.Sustainer.canards.trailingEdge.class" -> Fail
                 Attempt2 = "Rocket.Sustainer.canards.class" -> FinSet -> look up 'FinSet.trailingEdge.shape' in defaultDict -> if there, return it, otherwise return None
         '''
-        splitLevel = getKeyLevel(key)
+        cached = self._classDefaultCache.get(key, _MISSING)
+        if cached is not _MISSING:
+            if cached is None:
+                return None
 
-        while splitLevel >= 0:
-            prefix, suffix = splitKeyAtLevel(key, splitLevel)
-            
-            try:
-                classKey = prefix + ".class"
-                className = self.dict[classKey]                
+            defaultValue, classBasedDefaultKey, classKey = cached
+
+            # Replay the usage-tracking side effects of the original lookup
+            self.defaultValuesUsed.add(classBasedDefaultKey)
+            self.unaccessedFields.discard(classKey)
+
+            return defaultValue
+
+        # Walk the prefix boundaries from right to left with rfind - each iteration just
+        # re-slices the key at the next dot, instead of re-splitting it per level
+        cut = len(key)
+        while cut != -1:
+            # '<prefix>.class' is absent far more often than present - dict.get keeps the common
+            # case on the no-exception path
+            classKey = key[:cut] + ".class"
+            className = self.dict.get(classKey)
 
+            if className is not None:
                 # As soon as we arrive at an item with a class, search terminates
-                try:
-                    classBasedDefaultKey = className + "." + suffix
-                    defaultValue = self.defaultDict[classBasedDefaultKey]
-
-                    # Track that we've used a default value
-                    self.defaultValuesUsed.add(classBasedDefaultKey)
-                    
-                    # if the classKey was useful, count it as 'used'
-                    if classKey in self.unaccessedFields: 
-                        self.unaccessedFields.remove(classKey)
-                        
-                    return defaultValue
-                except KeyError:
+                classBasedDefaultKey = className + "." + key[cut+1:]
+                defaultValue = self.defaultDict.get(classBasedDefaultKey)
+
+                if defaultValue is None:
+                    self._classDefaultCache[key] = None
                     return None # class-based default value not found
-            
-            except KeyError:
-                pass # prefix.class not present
+
+                # Track that we've used a default value
+                self.defaultValuesUsed.add(classBasedDefaultKey)
+
+                # if the classKey was useful, count it as 'used'
+                self.unaccessedFields.discard(classKey)
+
+                self._classDefaultCache[key] = (defaultValue, classBasedDefaultKey, classKey)
+
+                return defaultValue
 
             # Move one level up the dictionary for next attempt
-            splitLevel -= 1
-        
+            cut = key.rfind('.', 0, cut)
+
+        self._classDefaultCache[key] = None
         return None
 
     #### Usage Reporting ####
@@ -787,9 +999,8 @@ class SimDefinition():
         '''
         if len(self.unaccessedFields) > 0:
             print("\nWarning: The following keys were loaded from: {} but never accessed:".format(self.fileName))
-            for key in sorted(self.unaccessedFields):
-                value = self.dict[key]
-                print("{:<45}{}".format(key+":", value))
+            items = [ (key, self.dict[key]) for key in sorted(self.unaccessedFields) ]
+            print("\n".join(f"{key+':':<45}{value}" for key, value in items))
             print("")
 
     def printDefaultValuesUsed(self):
@@ -798,9 +1009,8 @@ class SimDefinition():
         '''
         if len(self.defaultValuesUsed):
             print("\nWarning: The following default values were used in this simulation:")
-            for key in sorted(self.defaultValuesUsed):
-                value = self.defaultDict[key]
-                print("{:<45}{}".format(key+":", value))
+            items = [ (key, self.defaultDict[key]) for key in sorted(self.defaultValuesUsed) ]
+            print("\n".join(f"{key+':':<45}{value}" for key, value in items))
             print("\nIf this was not intended, override the default values by adding the above information to your simulation definition file.\n")
         
     def _resetUsageTrackers(self):
@@ -811,15 +1021,12 @@ class SimDefinition():
 
     #### Utilities ####
     def __str__(self):
-        result = ""
-        result += "File: " + self.fileName + "\n"
+        # Build the lines in a list and join once - O(n), unlike repeated string concatenation
+        parts = [ "File: " + self.fileName ]
+        parts.extend("{}: {}".format(key, value) for key, value in self.dict.items())
+        parts.append("")
 
-        for key, value in self.dict.items():
-            result += "{}: {}\n".format(key, value)
-
-        result += "\n"
-
-        return result
+        return "\n".join(parts) + "\n"
 
     def __eq__ (self, simDef2):
         try:
@@ -844,30 +1051,32 @@ def isSubKey(potentialParent:str, potentialChild:str) -> bool:
     if potentialParent == "":
         # All keys are children of an empty key
         return True
-    
+
     pLength = len(potentialParent)
-    cLength = len(potentialChild)
 
-    if cLength <= pLength:
-        # Child key can't be shorter than parent key
-        return False
-    elif potentialChild[:pLength] == potentialParent and potentialChild[pLength] == ".":
-        # Child key must contain parent key
-        return True
-    else:
-        return False
+    # Child key must be longer than the parent key, start with it, and continue with a '.'
+    return len(potentialChild) > pLength and potentialChild[pLength] == "." and potentialChild.startswith(potentialParent)
+
+@functools.lru_cache(maxsize=4096)
+def _splitKey(key:str) -> Tuple[str]:
+    '''
+        Cached `key.split('.')`, as a tuple. Keys are immutable strings parsed once from a file
+        and then split over and over by the functions below - the cache makes repeat splits free.
+        Bounded so long batch/optimization runs parsing many definitions can't grow it indefinitely
+    '''
+    return tuple(key.split('.'))
 
 def getKeyLevel(key:str) -> int:
     """
-        Sums the number of dots in the key 
-        ## Example 
-            getKeyLevel("Rocket") -> 0  
+        Sums the number of dots in the key
+        ## Example
+            getKeyLevel("Rocket") -> 0
             getKeyLevel("Rocket.name") -> 1
     """
     if len(key) == 0:
         return -1
     else:
-        return len(key.split('.'))-1
+        return len(_splitKey(key))-1
 
 def getParentKeyAtLevel(key:str, desiredLevel:int) -> str:
     """
@@ -878,7 +1087,7 @@ def getParentKeyAtLevel(key:str, desiredLevel:int) -> str:
         >>> getParentKeyAtLevel('Rocket.Sustainer.Nosecone.mass', 2)
         'Rocket.Sustainer.Nosecone'
     """
-    desiredParts = key.split('.')[0:desiredLevel+1]
+    desiredParts = _splitKey(key)[0:desiredLevel+1]
     return '.'.join(desiredParts)
 
 def getImmediateSubKey(parent, child):
@@ -907,34 +1116,40 @@ def splitKeyAtLevel(key:str, prefixLevel:int) -> Tuple[str]:
         ('Rocket.Sustainer', 'position')
     '''
     n = prefixLevel + 1
-    keyNames = key.split('.')
-    prefix = ".".join(keyNames[:n])
-    suffix = ".".join(keyNames[n:])
-    return prefix, suffix
+    # maxsplit stops scanning after n separators and returns the entire suffix as the last element,
+    # so no join is needed to reassemble it
+    keyNames = key.split('.', n)
+
+    if len(keyNames) <= n:
+        return key, ''
+
+    return ".".join(keyNames[:n]), keyNames[n]
+
+_FILE_EXTS = (".csv", '.pdf', '.mapleaf', '.txt', '.py', '.eng') # Add file extensions here to have filled paths in simulation definition files ending in these extensions auto corrected
 
 def isFileName(value:str) -> bool:
-    expectedExtensions = [".csv", '.pdf', '.mapleaf', '.txt', '.py', '.eng'] # And file extensions here to have filled paths in simulation definition files ending in these extensions auto corrected
-    for ext in expectedExtensions:
-        if ext in value:
-            return True
-    
-    return False
+    # endswith accepts a tuple and checks all the extensions in a single C call.
+    # Also tighter than the old substring check, which matched extensions anywhere in the value
+    return value.endswith(_FILE_EXTS)
 
 def pathIsRelativeToRepository(possiblePath:str) -> bool:
-    return  len(possiblePath) > 8 and possiblePath[:8] == "MAPLEAF/"
+    return possiblePath.startswith("MAPLEAF/")
 
-def getAbsoluteFilePath(relativePath: str, alternateRelativeLocation: str = "", silent=False) -> str:
-    ''' 
-        Takes a path defined relative to the MAPLEAF repository and tries to return an absolute path for the current installation.
-        alternateRelativeLocation (str) location of an alternate file/folder the path could be relative to
-        Returns original relativePath if an absolute path is not found
+# This file is at MAPLEAF/IO/SimDefinition, so MAPLEAF's install directory is three levels up
+_pathToMAPLEAFInstallation = Path(__file__).parent.parent.parent
+
+@functools.lru_cache(maxsize=4096)
+def _findAbsoluteFilePath(relativePath: str, alternateRelativeLocation: str) -> Union[str, None]:
+    '''
+        Cached core of `getAbsoluteFilePath` - the filesystem layout is stable during a parse, so
+        repeated lookups of the same path skip the os.path.exists probes.
+        The cache is cleared each time a new root SimDefinition parse starts, so results (including
+        misses) never outlive the parse that produced them.
+        Returns None if no existing absolute location is found.
     '''
     # Check if path is relative to MAPLEAF installation location
-    # This file is at MAPLEAF/IO/SimDefinition, so MAPLEAF's install directory is three levels up
-    pathToMAPLEAFInstallation = Path(__file__).parent.parent.parent
-
     relativePath = Path(relativePath)
-    absolutePath = pathToMAPLEAFInstallation / relativePath
+    absolutePath = _pathToMAPLEAFInstallation / relativePath
 
     if absolutePath.exists():
         return str(absolutePath)
@@ -942,7 +1157,7 @@ def getAbsoluteFilePath(relativePath: str, alternateRelativeLocation: str = "",
         if alternateRelativeLocation != "":
             # Try alternate location
             alternateLocation = Path(alternateRelativeLocation)
-            
+
             if alternateLocation.is_file():
                 # If the alternate location provided is a file path, check if the file is in the parent directory
                 absolutePath = alternateLocation.parent / relativePath
@@ -951,9 +1166,22 @@ def getAbsoluteFilePath(relativePath: str, alternateRelativeLocation: str = "",
 
             if absolutePath.exists():
                 return str(absolutePath)
-                
+
+    return None
+
+def getAbsoluteFilePath(relativePath: str, alternateRelativeLocation: str = "", silent=False) -> str:
+    '''
+        Takes a path defined relative to the MAPLEAF repository and tries to return an absolute path for the current installation.
+        alternateRelativeLocation (str) location of an alternate file/folder the path could be relative to
+        Returns original relativePath if an absolute path is not found
+    '''
+    absolutePath = _findAbsoluteFilePath(relativePath, alternateRelativeLocation)
+    if absolutePath != None:
+        return absolutePath
+
+    relativePath = str(Path(relativePath))
     if not silent:
-        if ".pdf" not in str(relativePath): # Assume .pdf files are outputs, may not be created yet - so we wouldn't expect to find them immediately!
+        if ".pdf" not in relativePath: # Assume .pdf files are outputs, may not be created yet - so we wouldn't expect to find them immediately!
             print("WARNING: Unable to compute absolute path replacement for: {}, try providing an absolute path".format(relativePath))
-        
-    return str(relativePath)
+
+    return relativePath
@@ -202,6 +202,13 @@ class TestSimDefinition(unittest.TestCase):
         simDef2 = SimDefinition("test/test_IO/testDerivedDictsFinal.mapleaf")
         self.assertEqual(simDef, simDef2)
 
+    def test_ParsingDerivedDict_interactingReplaceCommands(self):
+        # Consecutive !replace commands where the first one's output creates the second one's search string
+            # Must be applied sequentially - results would differ if they were fused into a single pass
+        simDef = SimDefinition("test/test_IO/testInteractingReplaces.mapleaf")
+        simDef2 = SimDefinition("test/test_IO/testInteractingReplacesFinal.mapleaf")
+        self.assertEqual(simDef, simDef2)
+
     def test_contains(self):
         self.assertTrue("Dictionary1.key1" in self.simDef)
         self.assertTrue("Dictionary1.key2" in self.simDef)